@@ -1,13 +1,45 @@
 import pyautogui
+import asyncio
+import inspect
 import time
 import random
 import json
+import copy
 import os
 import logging
+import threading
+import contextvars
 import cv2
+import mss
 import numpy as np
-from typing import Dict, Tuple, Optional, Any
+from typing import Dict, List, Mapping, Tuple, Optional, Any
 from functools import wraps
+from collections import defaultdict
+from pathlib import Path
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # C 扩展解析，缺失时回退标准库 json
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # numba 为可选依赖，缺失时全部走 OpenCV
+    njit = None
+
+try:
+    import scipy.fft as fft_backend  # 支持 float32 与多线程
+    # 整帧频谱每帧只算一次，用满所有核心；逐模板变换已由 find_any 线程池并行，各自单线程
+    _FFT_KWARGS = {'workers': -1}
+    _FFT_KWARGS_SERIAL = {'workers': 1}
+except ImportError:
+    fft_backend = np.fft
+    _FFT_KWARGS = {}
+    _FFT_KWARGS_SERIAL = {}
+
+CONFIG_PATH = 'config.json'
 
 # 配置日志格式
 logging.basicConfig(
@@ -16,14 +48,112 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
+# ==================== 配置模块 ====================
+_DEFAULT_CONFIG = {
+    'battle': {
+        'retry_interval': 2,
+        'confidence_thresholds': {
+            'continue.png': 0.4,
+            'default': 0.8
+        },
+        'battle_duration': 120,
+        'humanize': False,
+        'exact_templates': [],
+        'roi_hints': {}
+    }
+}
+
+def _deep_merge(base: Dict, update: Dict) -> Dict:
+    """深度合并字典"""
+    for key, val in update.items():
+        if isinstance(val, dict):
+            base[key] = _deep_merge(base.get(key, {}), val)
+        else:
+            base[key] = val
+    return base
+
+def _freeze(value: Any) -> Any:
+    """递归转为只读结构，匹配线程共享时无需防御性拷贝"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(val) for key, val in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(val) for val in value)
+    return value
+
+def _read_config() -> Mapping:
+    """读取配置文件并与默认配置合并（模块导入时执行一次）"""
+    base = copy.deepcopy(_DEFAULT_CONFIG)
+    loads = orjson.loads if orjson is not None else json.loads
+    try:
+        return _freeze(_deep_merge(base, loads(Path(CONFIG_PATH).read_bytes())))
+    except Exception as e:
+        logging.warning(f"使用默认配置: {str(e)}")
+        return _freeze(base)
+
+_CONFIG = _read_config()
+
 # ==================== 装饰器模块 ====================
 class TimingController:
     """时间控制装饰器集合（修复参数传递问题）"""
-    
+    # 当前任务所在的计时区间，各 asyncio 任务互不干扰
+    _active_timer: contextvars.ContextVar = contextvars.ContextVar('active_timer', default=None)
+
+    class ContextTimer:
+        """计时区间：统计代码块总耗时及其中经由 TimingController 的等待时间，退出时输出日志"""
+
+        def __init__(self, name: str):
+            self.name = name
+            self.idle = 0.0
+
+        def __enter__(self):
+            self._parent = TimingController._active_timer.get()
+            self._token = TimingController._active_timer.set(self)
+            self._start = time.monotonic()
+            return self
+
+        def __exit__(self, *exc_info):
+            elapsed = time.monotonic() - self._start
+            TimingController._active_timer.reset(self._token)
+            if self._parent is not None:
+                self._parent.idle += self.idle  # 嵌套区间的等待计入外层
+            logging.info(f"[{self.name}] 耗时 {elapsed:.2f}s，其中等待 {self.idle:.2f}s")
+            return False
+
+    @classmethod
+    def _record(cls, seconds: float) -> None:
+        """把等待时长计入当前计时区间"""
+        if (timer := cls._active_timer.get()) is not None:
+            timer.idle += seconds
+
+    @classmethod
+    async def sleep(cls, seconds: float) -> None:
+        """非阻塞等待，并计入当前计时区间"""
+        cls._record(seconds)
+        await asyncio.sleep(seconds)
+
     @classmethod
     def delay(cls, pre_delay: float = 0, post_delay: float = 0):
-        """通用延迟装饰器（自动处理时间参数）"""
+        """通用延迟装饰器（自动处理时间参数，协程函数使用非阻塞等待）"""
         def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    actual_pre = kwargs.pop('pre_delay', pre_delay)
+                    actual_post = kwargs.pop('post_delay', post_delay)
+
+                    if actual_pre > 0:
+                        logging.debug(f"[{func.__name__}] 前置等待 {actual_pre}s")
+                        await cls.sleep(actual_pre)
+
+                    result = await func(*args, **kwargs)
+
+                    if actual_post > 0:
+                        logging.debug(f"[{func.__name__}] 后置等待 {actual_post}s")
+                        await cls.sleep(actual_post)
+
+                    return result
+                return async_wrapper
+
             @wraps(func)
             def wrapper(*args, **kwargs):
                 # 提取时间参数并移除
@@ -33,6 +163,7 @@ class TimingController:
                 # 处理前置等待
                 if actual_pre > 0:
                     logging.debug(f"[{func.__name__}] 前置等待 {actual_pre}s")
+                    cls._record(actual_pre)
                     time.sleep(actual_pre)
                 
                 # 执行原始方法
@@ -41,114 +172,592 @@ class TimingController:
                 # 处理后置等待
                 if actual_post > 0:
                     logging.debug(f"[{func.__name__}] 后置等待 {actual_post}s")
+                    cls._record(actual_post)
                     time.sleep(actual_post)
                 
                 return result
             return wrapper
         return decorator
 
+# ==================== 加速内核 ====================
+# 窗口逐像素方差下限（灰度取值 [0, 1]）：低于此值视为纯色，只剩舍入误差，相关系数记 0
+_MIN_PIXEL_VAR = 1e-6
+
+if njit is not None:
+    # 不开启 parallel：find_any 的线程池会并发调用本内核，numba 默认线程层不支持嵌套并行；
+    # nogil 让各线程真正并行执行
+    @njit(nogil=True, fastmath=True, cache=True)
+    def ncc_scan(screen, tmpl, t_mean, t_std, out):
+        """小模板 NCC 扫描，结果与 TM_CCOEFF_NORMED 一致，窗口统计量取自积分图"""
+        H, W = screen.shape
+        h, w = tmpl.shape
+        n = h * w
+        t_sq = t_std * t_std * n
+
+        sat = np.zeros((H + 1, W + 1), np.float64)
+        sqsat = np.zeros((H + 1, W + 1), np.float64)
+        for y in range(H):
+            row = 0.0
+            row_sq = 0.0
+            for x in range(W):
+                v = np.float64(screen[y, x])
+                row += v
+                row_sq += v * v
+                sat[y + 1, x + 1] = sat[y, x + 1] + row
+                sqsat[y + 1, x + 1] = sqsat[y, x + 1] + row_sq
+
+        for y in range(H - h + 1):
+            for x in range(W - w + 1):
+                s = sat[y + h, x + w] - sat[y, x + w] - sat[y + h, x] + sat[y, x]
+                s2 = sqsat[y + h, x + w] - sqsat[y, x + w] - sqsat[y + h, x] + sqsat[y, x]
+                var = s2 - s * s / n
+                if var <= n * _MIN_PIXEL_VAR or t_sq <= n * _MIN_PIXEL_VAR:
+                    out[y, x] = 0.0
+                    continue
+                acc = 0.0
+                for i in range(h):
+                    for j in range(w):
+                        acc += screen[y + i, x + j] * (tmpl[i, j] - t_mean)
+                out[y, x] = acc / np.sqrt(var * t_sq)
+else:
+    ncc_scan = None
+
+def warmup_ncc() -> None:
+    """用空数组预编译 NCC 内核，避免首次查找承担 JIT 开销"""
+    if ncc_scan is None:
+        return
+    screen = np.zeros((32, 32), np.float32)[4:28, 4:28]  # 与实际 ROI 切片相同的非连续布局
+    tmpl = np.zeros((8, 8), np.float32)
+    ncc_scan(screen, tmpl, 0.0, 0.0, np.empty((17, 17), np.float32))
+
 # ==================== 核心功能模块 ====================
+class TemplateTable:
+    """模板元数据表：按整数 id 索引的并列数组，热路径中不再按文件名查字典"""
+    __slots__ = ('ids', 'names', 'imgs', 'means', 'stds', 'confs', 'exact', 'rois', 'name_to_id')
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.names: List[str] = []
+        self.imgs: List[Optional[List[np.ndarray]]] = []  # 每个模板的 float32 金字塔，加载失败为 None
+        self.means: List[Optional[List[float]]] = []      # 各层均值，供 NCC 归一化
+        self.stds: List[Optional[List[float]]] = []       # 各层标准差
+        self.confs: List[float] = []
+        self.exact: List[bool] = []                       # 像素级精确的按钮先在 ROI 内走 TM_SQDIFF
+        self.rois: List[Optional[List[int]]] = []
+        self.name_to_id: Dict[str, int] = {}
+
+    def add(self,
+            name: str,
+            pyramid: Optional[List[np.ndarray]],
+            conf: float,
+            roi: Optional[List[int]],
+            exact: bool = False) -> int:
+        """登记模板并返回其 id（同时缓存各层统计量）"""
+        tid = len(self.ids)
+        self.ids.append(tid)
+        self.names.append(name)
+        self.imgs.append(pyramid)
+        self.means.append([float(level.mean()) for level in pyramid] if pyramid else None)
+        self.stds.append([float(level.std()) for level in pyramid] if pyramid else None)
+        self.confs.append(conf)
+        self.exact.append(exact)
+        self.rois.append(roi)
+        self.name_to_id[name] = tid
+        return tid
+
 class ImageFinder():
-    _IMAGE_CACHE: Dict[str, np.ndarray] = {}
+    _IMAGE_CACHE: Dict[str, Optional[List[np.ndarray]]] = {}
+    _PYRAMID_LEVELS = 3      # 金字塔层数（含原图）
+    _PYRAMID_MIN_SIDE = 16   # 粗匹配层模板最短边下限，过小则退回上一层
+    _COARSE_RELAX = 0.3      # 粗匹配阈值放宽量
+    _COARSE_CANDIDATES = 3   # 粗匹配保留的候选点数
+    _REFINE_MARGIN = 8       # 精匹配 ROI 外扩像素
+    _SCREEN_TTL = 0.25       # 截图复用时长（秒）
+    _ROI_HINT_MARGIN = 20    # 自动学习 ROI 时在模板四周外扩的像素
+    _NCC_JIT_MAX_AREA = 4096        # 低于该面积的模板使用 numba 内核
+    _NCC_JIT_MAX_CANDIDATES = 4096  # 候选位置过多时 OpenCV 更快
+    _POLL_INTERVAL = 0.25    # 重试轮询初始间隔（秒）
+    _POLL_INTERVAL_MAX = 2.0 # 重试轮询间隔上限（秒）
+    _RING_SIZE = 2           # 截图缓冲槽数：新帧写入下一槽，上一帧仍可被匹配线程安全读取
+    _CLICK_JITTER = 5        # 点击坐标随机偏移像素
+    _EXACT_MAX_SQDIFF = 1e-4      # 精确匹配允许的逐像素平均平方差（灰度取值 [0, 1]）
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Mapping):
         self.config = config
+        thresholds = config['battle']['confidence_thresholds']
+        default = thresholds['default']
+        # 模板名 -> 置信度阈值，未单独配置的模板取默认值
+        self._confidence: Dict[str, float] = defaultdict(lambda: default, thresholds)
+        self.table = TemplateTable()
+        self._hint_lock = threading.Lock()
+        self._dirty_hints: Dict[str, List[int]] = {}  # 新学到、尚未写回配置文件的查找区域
+        # OpenCV 在 matchTemplate 内部释放 GIL，多模板可并行匹配
+        self._pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+        # 截图与整帧预处理放在专用线程，不占用事件循环；mss 句柄在该线程内创建，常驻复用
+        self._grab_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='grab')
+        self._sct = self._grab_pool.submit(mss.mss).result()
+        self._monitor = self._sct.monitors[1]  # 匹配坐标相对该显示器左上角，点击前需加回其原点
+        # 预分配的截图缓冲：每槽为 (灰度图, float32 金字塔)
+        self._ring: List[Optional[Tuple[np.ndarray, List[np.ndarray]]]] = [None] * self._RING_SIZE
+        self._ring_pos = 0
+        self._screen_ts = 0.0  # 缓存帧的截取时刻
+        self._screen_pyramid: Optional[List[np.ndarray]] = None
+        # id(帧层) -> (帧层, 积分图, 平方积分图)，随新截图一起失效
+        self._integral_cache: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        # id(帧层) -> (帧层, 频谱)，仅批量查找时计算
+        self._spectrum_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        # 两类缓存各用一把锁，计算频谱时不阻塞只需积分图的线程
+        self._integral_lock = threading.Lock()
+        self._spectrum_lock = threading.Lock()
+        # (模板 id, 层, 帧尺寸) -> 补零到帧尺寸后的模板频谱共轭
+        self._template_fft: Dict[Tuple[int, int, Tuple[int, int]], np.ndarray] = {}
+
+    @property
+    def monitor(self) -> Mapping:
+        """截图所用显示器的区域（left/top/width/height）"""
+        return self._monitor
+
+    def prewarm(self, img_names, batch_names=()) -> None:
+        """启动预热：加载并登记模板，在空白帧上各跑一遍其会用到的匹配路径
+
+        首次真实查找时不再承担读盘、JIT 编译、OpenCV 内部初始化及模板频谱计算的开销；
+        频域路径只为会交给 find_any 的 batch_names 预热，其余模板不缓存整帧频谱
+        """
+        warmup_ncc()
+        dummy = self._alloc_slot(self._monitor['height'], self._monitor['width'])[1]
+        for level in dummy:
+            level.fill(0)
+        for img_name in img_names:
+            tid = self.template_id(img_name)
+            if self.table.imgs[tid] is None:
+                continue
+            h, w = self.table.imgs[tid][0].shape[:2]
+            if self.table.exact[tid]:
+                self._match_exact(dummy[0], tid, (0, 0, w + self._REFINE_MARGIN, h + self._REFINE_MARGIN))
+            self._match_region(dummy[0], tid, (0, 0, w + self._REFINE_MARGIN, h + self._REFINE_MARGIN))
+            if img_name in batch_names:
+                self._match_pyramid(dummy, tid, use_fft=True)  # 同时缓存该帧尺寸下的模板频谱
+            else:
+                self._match_pyramid(dummy, tid)
+        self.invalidate_screen()  # 清掉空白帧留下的积分图与频谱缓存
+        logging.info(f"模板预热完成: {len(img_names)} 个")
+
+    def template_id(self, img_name: str) -> int:
+        """解析模板名对应的 id，首次出现时加载并登记"""
+        if (tid := self.table.name_to_id.get(img_name)) is not None:
+            return tid
+        battle = self.config['battle']
+        return self.table.add(
+            img_name,
+            self._load_image(img_name),
+            self._confidence[img_name],
+            self._checked_hint(img_name, battle.get('roi_hints', {}).get(img_name)),
+            exact=img_name in battle.get('exact_templates', ())
+        )
+
+    @staticmethod
+    def _checked_hint(img_name: str, hint: Any) -> Optional[List[int]]:
+        """校验配置中的查找区域 [x, y, w, h]，格式不对时丢弃并告警，改为全屏查找"""
+        if hint is None:
+            return None
+        if (isinstance(hint, (list, tuple)) and len(hint) == 4
+                and all(isinstance(v, int) and not isinstance(v, bool) and v >= 0 for v in hint)
+                and hint[2] > 0 and hint[3] > 0):
+            return list(hint)
+        logging.warning(f"忽略无效的查找区域 {img_name}: {hint}")
+        return None
+
+    def template_ids(self, *img_names: str) -> Tuple[int, ...]:
+        """批量解析模板 id，供各阶段开始时一次性取用"""
+        return tuple(self.template_id(name) for name in img_names)
+
+    def _alloc_slot(self, height: int, width: int) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """按屏幕尺寸分配一个缓冲槽"""
+        levels = []
+        h, w = height, width
+        for _ in range(self._PYRAMID_LEVELS):
+            levels.append(np.empty((h, w), np.float32))
+            h, w = (h + 1) // 2, (w + 1) // 2
+        return np.empty((height, width), np.uint8), levels
+
+    def _grab_screen(self) -> List[np.ndarray]:
+        """截取主显示器并写入环形缓冲的下一槽，返回该槽的 float32 金字塔"""
+        raw = self._sct.grab(self._monitor)
+        bgra = np.frombuffer(raw.raw, dtype=np.uint8).reshape(raw.height, raw.width, 4)
+
+        self._ring_pos = (self._ring_pos + 1) % self._RING_SIZE
+        slot = self._ring[self._ring_pos]
+        if slot is None or slot[0].shape != (raw.height, raw.width):
+            slot = self._alloc_slot(raw.height, raw.width)
+            self._ring[self._ring_pos] = slot
+
+        # 全部写入预分配缓冲，每帧只转换一次到 [0, 1] 浮点
+        gray, levels = slot
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=gray)
+        np.multiply(gray, np.float32(1 / 255), out=levels[0])
+        for i in range(1, len(levels)):
+            cv2.pyrDown(levels[i - 1], dst=levels[i])
+        return levels
+
+    def _get_screen(self) -> List[np.ndarray]:
+        """获取当前屏幕的 float32 金字塔，TTL 内直接复用缓存帧"""
+        now = time.monotonic()
+        if self._screen_pyramid is None or now - self._screen_ts >= self._SCREEN_TTL:
+            self._screen_pyramid = self._grab_screen()
+            self._screen_ts = now
+            self._integral_cache = {}
+            self._spectrum_cache = {}
+        return self._screen_pyramid
 
-    def _load_image(self, img_name: str) -> Optional[np.ndarray]:
-        """封装图片加载逻辑"""
+    def invalidate_screen(self) -> None:
+        """丢弃缓存帧，下次查找强制重新截图"""
+        self._screen_ts = 0.0
+        self._screen_pyramid = None
+        self._integral_cache = {}
+        self._spectrum_cache = {}
+
+    def _build_pyramid(self, img: np.ndarray) -> List[np.ndarray]:
+        """构建高斯金字塔，第 i 层为原图的 1/2^i"""
+        levels = [img]
+        for _ in range(self._PYRAMID_LEVELS - 1):
+            levels.append(cv2.pyrDown(levels[-1]))
+        return levels
+
+    def _load_image(self, img_name: str) -> Optional[List[np.ndarray]]:
+        """封装图片加载逻辑（缓存整座 float32 金字塔）"""
         if img_name in self._IMAGE_CACHE:
             return self._IMAGE_CACHE[img_name]
             
-        img_path = os.path.join('images', img_name)
-        if not os.path.exists(img_path):
-            logging.error(f"图片路径不存在: {img_path}")
-            self._IMAGE_CACHE[img_name] = None
-            return None
-
+        img_path = Path('images', img_name)
         try:
-            img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
+            # 直接读取，缺失时抛出 FileNotFoundError，省去单独的 exists 检查
+            buf = img_path.read_bytes()
+            img = cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_GRAYSCALE)
             if img is None:
                 raise ValueError("OpenCV无法解码图像")
-            self._IMAGE_CACHE[img_name] = img
-            return img
+            # 预先转为连续 float32，匹配时无需逐次转换
+            pyramid = self._build_pyramid(np.ascontiguousarray(img, dtype=np.float32) / 255.0)
+            self._IMAGE_CACHE[img_name] = pyramid
+            return pyramid
+        except FileNotFoundError:
+            logging.error(f"图片路径不存在: {img_path}")
+            self._IMAGE_CACHE[img_name] = None
+            return None
         except Exception as e:
             logging.error(f"图片加载失败 [{img_path}]: {str(e)}")
             self._IMAGE_CACHE[img_name] = None  # 缓存加载失败状态
             return None
 
-    @TimingController.delay(pre_delay=0.5)
-    def find_image(self, img_name: str) -> Optional[Tuple[int, int]]:
-        """基础查找方法"""
-        image = self._load_image(img_name)
-        if image is None:
+    def click_target(self,
+                     position: Tuple[int, int],
+                     offset_x: int = 0,
+                     offset_y: int = 0,
+                     random_jitter: bool = True) -> Tuple[int, int]:
+        """由匹配中心计算可直接点击的全局坐标（偏移、随机抖动、裁剪到截图显示器范围）"""
+        x = position[0] + offset_x
+        y = position[1] + offset_y
+        if random_jitter:
+            x += random.randint(-self._CLICK_JITTER, self._CLICK_JITTER)
+            y += random.randint(-self._CLICK_JITTER, self._CLICK_JITTER)
+        mon = self._monitor
+        x = max(0, min(x, mon['width'] - 1))
+        y = max(0, min(y, mon['height'] - 1))
+        return mon['left'] + x, mon['top'] + y
+
+    def _integrals(self, img: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """取帧层的积分图与平方积分图，同一帧内所有模板共用"""
+        with self._integral_lock:
+            entry = self._integral_cache.get(id(img))
+            if entry is None or entry[0] is not img:
+                sat, sqsat = cv2.integral2(img, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+                entry = (img, sat, sqsat)
+                self._integral_cache[id(img)] = entry
+        return entry[1], entry[2]
+
+    def _spectrum(self, img: np.ndarray) -> np.ndarray:
+        """取帧层的实数 FFT，同一帧内所有模板共用（scipy.fft 下直接以 float32 计算）"""
+        with self._spectrum_lock:
+            entry = self._spectrum_cache.get(id(img))
+            if entry is None or entry[0] is not img:
+                entry = (img, fft_backend.rfft2(img, **_FFT_KWARGS))
+                self._spectrum_cache[id(img)] = entry
+        return entry[1]
+
+    def _fft_ccorr(self, tid: int, level: int, img: np.ndarray, tmpl: np.ndarray) -> np.ndarray:
+        """频域计算 TM_CCORR：帧频谱与缓存的模板频谱逐点相乘后逆变换"""
+        H, W = img.shape[:2]
+        h, w = tmpl.shape[:2]
+        key = (tid, level, (H, W))
+        if (tmpl_hat := self._template_fft.get(key)) is None:
+            padded = np.zeros((H, W), np.float32)
+            padded[:h, :w] = tmpl
+            tmpl_hat = np.conj(fft_backend.rfft2(padded, **_FFT_KWARGS_SERIAL))
+            self._template_fft[key] = tmpl_hat
+        corr = fft_backend.irfft2(self._spectrum(img) * tmpl_hat, s=(H, W), **_FFT_KWARGS_SERIAL)
+        return corr[:H - h + 1, :W - w + 1]
+
+    def _ncc_via_sat(self,
+                     img: np.ndarray,
+                     tmpl: np.ndarray,
+                     t_mean: float,
+                     t_std: float,
+                     ccorr: Optional[np.ndarray] = None) -> np.ndarray:
+        """借助积分图计算 TM_CCOEFF_NORMED 等价的相关系数图（可传入已算好的 TM_CCORR）"""
+        h, w = tmpl.shape[:2]
+        n = h * w
+        t_sq = t_std * t_std * n
+
+        sat, sqsat = self._integrals(img)
+        win_sum = sat[h:, w:] - sat[:-h, w:] - sat[h:, :-w] + sat[:-h, :-w]
+        win_sq = sqsat[h:, w:] - sqsat[:-h, w:] - sqsat[h:, :-w] + sqsat[:-h, :-w]
+
+        # 分子：sum(I * (T - mean_T)) = CCORR(I, T) - mean_T * sum(I)
+        if ccorr is None:
+            ccorr = cv2.matchTemplate(img, tmpl, cv2.TM_CCORR)
+        num = ccorr - t_mean * win_sum
+        win_var = win_sq - win_sum * win_sum / n
+        if t_sq <= n * _MIN_PIXEL_VAR:
+            return np.zeros_like(num)
+        den = np.sqrt(np.maximum(win_var, 0) * t_sq)
+        return np.divide(num, den, out=np.zeros_like(num), where=win_var > n * _MIN_PIXEL_VAR)
+
+    def _coarse_level(self, pyramid: List[np.ndarray]) -> int:
+        """选取模板仍足够大的最粗层"""
+        for level in range(len(pyramid) - 1, 0, -1):
+            if min(pyramid[level].shape[:2]) >= self._PYRAMID_MIN_SIDE:
+                return level
+        return 0
+
+    def _match_region(self,
+                      screen: np.ndarray,
+                      tid: int,
+                      region: Tuple[int, int, int, int]) -> Optional[Tuple[int, int]]:
+        """在原图 region=(x0, y0, x1, y1) 内匹配，返回模板中心坐标"""
+        table = self.table
+        tmpl = table.imgs[tid][0]
+        x0, y0, x1, y1 = region
+        h, w = tmpl.shape[:2]
+        if y1 - y0 < h or x1 - x0 < w:
+            return None
+
+        roi = screen[y0:y1, x0:x1]
+        res_shape = (y1 - y0 - h + 1, x1 - x0 - w + 1)
+        if (ncc_scan is not None and h * w < self._NCC_JIT_MAX_AREA
+                and res_shape[0] * res_shape[1] <= self._NCC_JIT_MAX_CANDIDATES):
+            res = np.empty(res_shape, np.float32)
+            ncc_scan(roi, tmpl, table.means[tid][0], table.stds[tid][0], res)
+        else:
+            res = cv2.matchTemplate(roi, tmpl, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        if max_val < table.confs[tid]:
+            return None
+        return (x0 + max_loc[0] + w // 2, y0 + max_loc[1] + h // 2)
+
+    def _match_exact(self,
+                     screen: np.ndarray,
+                     tid: int,
+                     region: Tuple[int, int, int, int]) -> Optional[Tuple[int, int]]:
+        """像素级精确匹配：TM_SQDIFF 取最小值，不做任何归一化，返回模板中心坐标"""
+        tmpl = self.table.imgs[tid][0]
+        x0, y0, x1, y1 = region
+        h, w = tmpl.shape[:2]
+        if y1 - y0 < h or x1 - x0 < w:
+            return None
+
+        res = cv2.matchTemplate(screen[y0:y1, x0:x1], tmpl, cv2.TM_SQDIFF)
+        min_val, _, min_loc, _ = cv2.minMaxLoc(res)
+        if min_val / tmpl.size >= self._EXACT_MAX_SQDIFF:
+            return None
+        return (x0 + min_loc[0] + w // 2, y0 + min_loc[1] + h // 2)
+
+    def _match_pyramid(self,
+                       screens: List[np.ndarray],
+                       tid: int,
+                       use_fft: bool = False) -> Optional[Tuple[int, int]]:
+        """由粗到精匹配：粗层定位候选点，再在原图小范围内精确匹配
+
+        use_fft 为真时粗匹配走频域，适合同一帧批量查找多个模板
+        """
+        table = self.table
+        pyramid, confidence = table.imgs[tid], table.confs[tid]
+        screen_h, screen_w = screens[0].shape[:2]
+        level = self._coarse_level(pyramid)
+        coarse, tmpl = screens[level], pyramid[level]
+        th, tw = tmpl.shape[:2]
+        if coarse.shape[0] < th or coarse.shape[1] < tw:
+            return None
+        ccorr = self._fft_ccorr(tid, level, coarse, tmpl) if use_fft else None
+        res = self._ncc_via_sat(coarse, tmpl, table.means[tid][level], table.stds[tid][level], ccorr)
+
+        if level == 0:  # 模板过小无法降采样，直接全屏精确匹配
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            if max_val < confidence:
+                return None
+            return (max_loc[0] + tw // 2, max_loc[1] + th // 2)
+
+        # 映射回原图坐标，外扩量需覆盖降采样带来的量化误差
+        scale = 1 << level
+        h, w = pyramid[0].shape[:2]
+        margin = self._REFINE_MARGIN + scale
+        for _ in range(self._COARSE_CANDIDATES):
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            if max_val < confidence - self._COARSE_RELAX:
+                break
+            x, y = max_loc[0] * scale, max_loc[1] * scale
+            region = (max(x - margin, 0), max(y - margin, 0),
+                      min(x + w + margin, screen_w), min(y + h + margin, screen_h))
+            if position := self._match_region(screens[0], tid, region):
+                return position
+            # 抑制该候选点邻域，继续尝试次高峰
+            res[max(max_loc[1] - th // 2, 0):max_loc[1] + th // 2 + 1,
+                max(max_loc[0] - tw // 2, 0):max_loc[0] + tw // 2 + 1] = -1
+        return None
+
+    def _learn_roi_hint(self, tid: int, position: Tuple[int, int], shape: Tuple[int, ...]) -> None:
+        """首次找到模板时记录其出现区域，供下次优先搜索（写盘由 save_roi_hints 统一完成）"""
+        img_name = self.table.names[tid]
+        h, w = shape[:2]
+        m = self._ROI_HINT_MARGIN
+        hint = [max(position[0] - w // 2 - m, 0), max(position[1] - h // 2 - m, 0), w + 2 * m, h + 2 * m]
+
+        with self._hint_lock:  # find_any 会在多个线程中同时登记
+            if self.table.rois[tid]:
+                return  # 已有提示：同一模板出现在多处时不来回覆盖
+            self.table.rois[tid] = hint
+            self._dirty_hints[img_name] = hint
+        logging.info(f"记录查找区域 {img_name}: {hint}")
+
+    def save_roi_hints(self) -> None:
+        """把新学到的查找区域一次性写回配置文件（不在匹配路径中调用）"""
+        with self._hint_lock:
+            hints, self._dirty_hints = self._dirty_hints, {}
+        if not hints:
+            return
+        try:
+            with open(CONFIG_PATH, encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+        data.setdefault('battle', {}).setdefault('roi_hints', {}).update(hints)
+        try:
+            with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            logging.warning(f"查找区域保存失败: {str(e)}")
+
+    def _locate(self,
+                tid: int,
+                screens: List[np.ndarray],
+                use_fft: bool = False) -> Optional[Tuple[int, int]]:
+        """在给定屏幕金字塔上定位模板（优先在 ROI 提示区域内查找）"""
+        table = self.table
+        pyramid = table.imgs[tid]
+        if pyramid is None:
             return None  # 已记录错误，直接返回
-           
+
         try:
-            confidence = self.config['battle']['confidence_thresholds'].get(
-                img_name, self.config['battle']['confidence_thresholds']['default']
-            )
-            location = pyautogui.locateCenterOnScreen(
-                self._IMAGE_CACHE[img_name],
-                confidence=confidence,
-                grayscale=True
-            )
-            return (location.x, location.y) if location else None
+            if hint := table.rois[tid]:
+                x, y, w, h = hint
+                region = (x, y, min(x + w, screens[0].shape[1]), min(y + h, screens[0].shape[0]))
+                # 像素级精确的按钮先做无归一化的 SQDIFF，未命中再走 NCC
+                if table.exact[tid] and (position := self._match_exact(screens[0], tid, region)):
+                    return position
+                if position := self._match_region(screens[0], tid, region):
+                    return position
+
+            # 无提示或提示区域未命中时回退全屏查找
+            position = self._match_pyramid(screens, tid, use_fft)
+            if position and not table.rois[tid]:
+                self._learn_roi_hint(tid, position, pyramid[0].shape)
+            return position
         except Exception as e:
-            logging.error(f"图像查找异常:{img_name} {str(e)}")
+            logging.error(f"图像查找异常:{table.names[tid]} {str(e)}")
             return None
 
-    @TimingController.delay()
-    def find_with_retry(self, 
-                      img_name: str, 
+    async def _screens(self) -> List[np.ndarray]:
+        """在截图线程中取当前屏幕金字塔"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._grab_pool, self._get_screen)
+
+    async def find_image(self, tid: int) -> Optional[Tuple[int, int]]:
+        """基础查找方法（匹配在线程池中执行，不阻塞事件循环），返回帧坐标系下的模板中心"""
+        try:
+            screens = await self._screens()
+        except Exception as e:
+            logging.error(f"截图失败: {str(e)}")
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._locate, tid, screens)
+
+    async def find_any(self, tids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """单次截图上并行匹配多个模板（共享帧频谱），返回所有命中模板的中心坐标"""
+        try:
+            screens = await self._screens()
+        except Exception as e:
+            logging.error(f"截图失败: {str(e)}")
+            return {}
+        loop = asyncio.get_running_loop()
+        positions = await asyncio.gather(
+            *(loop.run_in_executor(self._pool, self._locate, tid, screens, True) for tid in tids)
+        )
+        return {tid: pos for tid, pos in zip(tids, positions) if pos}
+
+    def retry_window(self, max_attempts: int = 3, base_interval: Optional[float] = None) -> float:
+        """原指数退避在最后一次尝试前覆盖的时长，即 base_interval * (2 + 4 + ... + 2^(max_attempts-1))"""
+        interval = base_interval or self.config['battle'].get('retry_interval', 1)
+        return interval * (2 ** max_attempts - 2)
+
+    async def find_with_retry(self, 
+                      tid: int, 
                       max_attempts: int = 3,
                       base_interval: float = None,
-                      **kwargs) -> Optional[Tuple[int, int]]:
-        """优化重试机制：指数退避+随机扰动"""
-        interval = base_interval or self.config['battle'].get('retry_interval', 1)
-        
-        for attempt in range(1, max_attempts + 1):
-            if position := self.find_image(img_name):
-                logging.info(f"成功找到 {img_name} (第{attempt}次)")
+                      max_wait: Optional[float] = None,
+                      poll_interval: float = None) -> Optional[Tuple[int, int]]:
+        """自适应轮询：截止时间内高频查找，连续未命中后逐步放宽间隔
+
+        max_wait 缺省时取 retry_window(max_attempts, base_interval)
+        """
+        if max_wait is None:
+            max_wait = self.retry_window(max_attempts, base_interval)
+        poll = poll_interval or self._POLL_INTERVAL
+        deadline = time.monotonic() + max_wait
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if position := await self.find_image(tid):
+                logging.info(f"成功找到 {self.table.names[tid]} (第{attempt}次)")
                 return position
-                
-            # 指数退避算法：2^attempt * base + random
-            sleep_time = (2 ** attempt) * interval + random.uniform(-0.2, 0.2)
-            logging.debug(f"等待 {sleep_time:.2f}s 后重试")
-            time.sleep(max(sleep_time, 0.1))  # 保证最小等待时间
-            
-        return None
+
+            if time.monotonic() + poll > deadline:
+                return None
+            logging.debug(f"等待 {poll:.2f}s 后重试")
+            await TimingController.sleep(poll)
+            self.invalidate_screen()  # 重试必须基于新画面
+            if attempt >= 3:  # 连续未命中后倍增间隔，降低长时间等待时的截图开销
+                poll = min(poll * 2, self._POLL_INTERVAL_MAX)
 
 class ClickExecutor():
-    def __init__(self, config: Dict):
-        self.config = config
-        self._CLICK_OFFSET = 5
+    def __init__(self, humanize: bool = False):
+        self.humanize = humanize  # 开启后保留拟人化的鼠标移动轨迹
         self._CLICK_DURATION_RANGE = (0.2, 0.5)
 
-    @TimingController.delay(pre_delay=0.3, post_delay=0.5)
-    def execute_click(self, 
-                    position: Tuple[int, int], 
-                    offset_x: int = 0,
-                    offset_y: int = 0,
-                    random_offset: bool = True) -> bool:
-        """执行点击操作"""
+    async def execute_click(self, target: Tuple[int, int]) -> bool:
+        """点击已算好的坐标（偏移与抖动由 ImageFinder.click_target 完成）"""
         try:
-            # 计算目标坐标
-            target_x = position[0] + offset_x
-            target_y = position[1] + offset_y
-
-            # 添加随机偏移
-            if random_offset:
-                target_x += random.randint(-self._CLICK_OFFSET, self._CLICK_OFFSET)
-                target_y += random.randint(-self._CLICK_OFFSET, self._CLICK_OFFSET)
-
-            screen_w, screen_h = pyautogui.size()
-            # 边界检查
-            target_x = max(0, min(target_x, screen_w))
-            target_y = max(0, min(target_y, screen_h))
-
-            # 执行点击
-            pyautogui.moveTo(target_x, target_y, duration=random.uniform(0.1, 0.3))
-            pyautogui.click(duration=random.uniform(*self._CLICK_DURATION_RANGE))
+            target_x, target_y = target
+            # 执行点击：瞬移到目标后按下，随机按住时长再抬起（_pause=False 跳过 pyautogui 每步的固定停顿）
+            if self.humanize:
+                # 带轨迹的移动会阻塞数百毫秒，放到线程中执行
+                await asyncio.to_thread(pyautogui.moveTo, target_x, target_y,
+                                        duration=random.uniform(0.1, 0.3), _pause=False)
+            else:
+                pyautogui.moveTo(target_x, target_y, _pause=False)
+            pyautogui.mouseDown(_pause=False)
+            try:
+                await asyncio.sleep(random.uniform(*self._CLICK_DURATION_RANGE))
+            finally:
+                pyautogui.mouseUp(_pause=False)
             # logging.info(f"成功点击坐标: ({target_x}, {target_y})")
             return True
         except Exception as e:
@@ -157,167 +766,205 @@ class ClickExecutor():
 
 # ==================== 业务逻辑模块 ====================
 class GameAuto:
-    def __init__(self):
-        self.cfg = self._load_config()
-        self.finder = ImageFinder(self.cfg)
-        self.clicker = ClickExecutor(self.cfg)
+    # 流程中用到的全部模板，启动时统一预热
+    KNOWN_TEMPLATES = (
+        'game_pos.png', 'select_start.png', 'battle_start.png',
+        'fatigue_value.png', 'ok.png', 'battle_skip.png', 'result.png',
+        'huodong.png', 'level.png', 'expensive.png', 'watch.png',
+    )
+    # 结算界面批量匹配（find_any）的模板，仅这些模板走频域路径
+    SKIP_TEMPLATES = (
+        'huodong.png', 'level.png', 'ok.png', 'result.png',
+        'expensive.png', 'watch.png', 'select_start.png',
+    )
+    _SKIP_MAX_ROUNDS = 15        # 结算界面最多处理轮数，防止点击失效时死循环
+    _SKIP_POLL_INTERVAL = 0.3    # 结算界面未命中时的重新截图间隔（秒）
+
+    def __init__(self, cfg: Optional[Mapping] = None):
+        self.cfg = cfg or self._load_config()
         self.origin_pos = None
         
+        self.finder = ImageFinder(self.cfg)
         self._init_screen_info()
-        self._find_origin_position()
-
-    def _load_config(self) -> Dict:
-        """加载配置文件"""
-        default_cfg = {
-            'battle': {
-                'retry_interval': 2,
-                'confidence_thresholds': {
-                    'continue.png': 0.4,
-                    'default': 0.8
-                },
-                'battle_duration': 120
-            }
-        }
-        
+        self.finder.prewarm(self.KNOWN_TEMPLATES, self.SKIP_TEMPLATES)
+        self.clicker = ClickExecutor(humanize=self.cfg['battle'].get('humanize', False))
+
+    async def run(self):
+        """定位游戏窗口后进入战斗循环，退出时保存未写回的查找区域"""
         try:
-            with open('config.json') as f:
-                return self._deep_merge(default_cfg, json.load(f))
-        except Exception as e:
-            logging.warning(f"使用默认配置: {str(e)}")
-            return default_cfg
-
-    def _deep_merge(self, base: Dict, update: Dict) -> Dict:
-        """深度合并字典"""
-        for key, val in update.items():
-            if isinstance(val, dict):
-                base[key] = self._deep_merge(base.get(key, {}), val)
-            else:
-                base[key] = val
-        return base
+            await self._find_origin_position()
+            await self.execute_battle_flow()
+        finally:
+            self.finder.save_roi_hints()
+
+    def _load_config(self) -> Mapping:
+        """加载配置（导入时已解析并冻结，不再重复读盘）"""
+        return _CONFIG
 
     def _init_screen_info(self):
-        """初始化屏幕信息"""
-        try:
-            self.screen_w, self.screen_h = pyautogui.size()
-            logging.info(f"屏幕分辨率: {self.screen_w}x{self.screen_h}")
-        except Exception as e:
-            logging.error(f"屏幕信息获取失败: {str(e)}")
-            raise
+        """输出屏幕信息（截图所用的显示器，点击坐标由 ImageFinder.click_target 按其换算与裁剪）"""
+        mon = self.finder.monitor
+        logging.info(f"屏幕分辨率: {mon['width']}x{mon['height']}，原点: ({mon['left']}, {mon['top']})")
 
-    def _find_origin_position(self):
-        """定位初始坐标（带自定义时间控制）"""
-        if position := self.finder.find_with_retry(
-            'game_pos.png',
-            pre_delay=1.0,  # 查找前等待
-            post_delay=1.0   # 找到后等待
-        ):
+    async def _find_origin_position(self):
+        """定位初始坐标（查找前后各等待画面稳定）"""
+        await TimingController.sleep(1.0)
+        if position := await self.finder.find_with_retry(self.finder.template_id('game_pos.png')):
             self.origin_pos = position
             logging.info(f"初始坐标: {position}")
+            await TimingController.sleep(1.0)
         else:
             raise RuntimeError("游戏初始坐标定位失败")
 
-    def smart_click(self, 
-                  img_name: str, 
+    @TimingController.delay()
+    async def smart_click(self, 
+                  tid: int, 
                   offset_x: int = 0, 
                   offset_y: int = 0,
                   **kwargs) -> bool:
-        """智能点击流程"""
-        if position := self.finder.find_with_retry(img_name, **kwargs):
-            return self.clicker.execute_click(
-                position,
-                offset_x,
-                offset_y,
-                **kwargs
-            )
+        """智能点击流程：查找返回帧坐标，统一经 click_target 换算为点击坐标
+
+        pre_delay / post_delay 只在此处生效一次，查找与点击内部不再附加固定等待
+        """
+        if position := await self.finder.find_with_retry(tid, **kwargs):
+            return await self.clicker.execute_click(self.finder.click_target(position, offset_x, offset_y))
         return False
 
-    def execute_battle_flow(self):
+    async def click_and_wait_for(self,
+                                 position: Tuple[int, int],
+                                 marker: int,
+                                 offset_x: int = 0,
+                                 offset_y: int = 0,
+                                 max_clicks: int = 2) -> Optional[Tuple[int, int]]:
+        """点击后确认下一界面标志出现，未出现才补点，返回标志坐标"""
+        for _ in range(max_clicks):
+            await self.clicker.execute_click(self.finder.click_target(position, offset_x, offset_y))
+            self.finder.invalidate_screen()  # 确认必须基于点击后的新画面
+            if marker_pos := await self.finder.find_with_retry(marker, max_attempts=2, poll_interval=0.3):
+                return marker_pos
+        return None
+
+    async def execute_battle_flow(self):
         """主战斗流程控制器"""
         logging.info("启动战斗循环")
         try:
             while True:
-                self._battle_cycle()
-        except KeyboardInterrupt:
+                await self._battle_cycle()
+        except asyncio.CancelledError:
             logging.info("用户中断操作")
+            raise
         except Exception as e:
             logging.error(f"运行异常: {str(e)}")
             raise
 
-    def _battle_cycle(self):
+    async def _battle_cycle(self):
         """完整的战斗周期"""
         # 进入配队界面（带自定义时间参数）
-        if self._process_phase('select_start.png', "配队界面", pre_delay=1.0):
-            if self._process_battle_start():
-                self._handle_battle_result()
+        select_start = self.finder.template_id('select_start.png')
+        with TimingController.ContextTimer("战斗周期"):
+            if await self._process_phase(select_start, "配队界面", pre_delay=1.0):
+                if await self._process_battle_start():
+                    await self._handle_battle_result()
+        # 每个周期结束时写回一次新学到的查找区域，不阻塞事件循环
+        await asyncio.to_thread(self.finder.save_roi_hints)
 
-    def _process_phase(self, img_name: str, phase_name: str, **kwargs) -> bool:
+    async def _process_phase(self, tid: int, phase_name: str, **kwargs) -> bool:
         """通用阶段处理器"""
-        if self.smart_click(img_name, **kwargs):
+        if await self.smart_click(tid, **kwargs):
             logging.info(f"进入 {phase_name}")
             return True
         logging.debug(f"未进入 {phase_name}")
         return False
 
-    def _process_battle_start(self) -> bool:
+    async def _process_battle_start(self) -> bool:
         """战斗开始处理流程"""
+        battle_start, fatigue, ok = self.finder.template_ids(
+            'battle_start.png', 'fatigue_value.png', 'ok.png')
         # 带时间参数的点击
-        if not self.smart_click('battle_start.png', post_delay=2.0):
+        if not await self.smart_click(battle_start, post_delay=2.0):
             return False
 
         # 处理疲劳值（带特殊重试参数）
-        if fatigue_pos := self.finder.find_with_retry(
-            'fatigue_value.png',
-            max_attempts=2,
-            pre_delay=0.5
-        ):
-            self.clicker.execute_click(fatigue_pos, offset_x=72, offset_y=55, pre_delay=1.0)
-            self.smart_click('ok.png', pre_delay=1.0)
-            return self.smart_click('battle_start.png', pre_delay=1.0,post_delay=2.0)
+        await TimingController.sleep(0.5)
+        if fatigue_pos := await self.finder.find_with_retry(fatigue, max_attempts=2):
+            await TimingController.sleep(1.0)
+            await self.clicker.execute_click(self.finder.click_target(fatigue_pos, offset_x=72, offset_y=55))
+            await self.smart_click(ok, pre_delay=1.0)
+            return await self.smart_click(battle_start, pre_delay=1.0,post_delay=2.0)
         return True
 
-    def _handle_battle_result(self):
+    async def _handle_battle_result(self):
         """战斗结果处理"""
         logging.info("进入战斗流程")
-        self.clicker.execute_click(self.origin_pos, 
-                                 offset_x=200, 
-                                 offset_y=200,
-                                 pre_delay=1.0)
-        # 重复点击一次防止之前没点击成功
-        self.clicker.execute_click(self.origin_pos, 
-                                 offset_x=200, 
-                                 offset_y=200,
-                                 pre_delay=2.0)
-
-        if self.smart_click('battle_skip.png', post_delay=1.0):
-            self._process_skip_battle()
+        # 点击画面后确认跳过按钮出现，未出现才补点一次
+        await TimingController.sleep(1.0)
+        if skip_pos := await self.click_and_wait_for(self.origin_pos,
+                                                     self.finder.template_id('battle_skip.png'),
+                                                     offset_x=200,
+                                                     offset_y=200):
+            await self.clicker.execute_click(self.finder.click_target(skip_pos))
+            await TimingController.sleep(1.0)
+            await self._process_skip_battle()
         else:
-            self._process_normal_battle()
-
-    def _process_skip_battle(self):
-        """跳过战斗处理"""
-        self.smart_click('ok.png', post_delay=1.0)
-        self.clicker.execute_click(self.origin_pos, 
-                                      offset_x=160, 
-                                      offset_y=100,
-                                      pre_delay=1.5)
-        self.smart_click('result.png', pre_delay=1.0)
-        if self.finder.find_with_retry('huodong.png', max_attempts=2, pre_delay=1.0):
-            self.smart_click('ok.png', pre_delay=1.0, max_attempts=2)
-        if self.finder.find_with_retry('level.png', max_attempts=2, pre_delay=1.0):
-            self.smart_click('ok.png', pre_delay=1.0, max_attempts=2)
-        self.smart_click('result.png', pre_delay=1.0)
-        self.smart_click('expensive.png', pre_delay=1.5)
-        # self.smart_click('expensive.png', pre_delay=1.5)
-        self.smart_click('watch.png', max_attempts=2, pre_delay=1.0)
-        time.sleep(3)
-    def _process_normal_battle(self):
+            await self._process_normal_battle()
+
+    async def _process_skip_battle(self):
+        """跳过战斗处理：每个界面状态截图一次，批量匹配后分派点击"""
+        tids = self.finder.template_ids(*self.SKIP_TEMPLATES)
+        huodong, level, ok, result, expensive, watch, select_start = tids
+        # 两次点击之间的等待合并为一次
+        await self.smart_click(ok, post_delay=2.5)
+        await self.clicker.execute_click(self.finder.click_target(self.origin_pos,
+                                                                  offset_x=160,
+                                                                  offset_y=100))
+
+        # (界面标志, 需点击的模板)，按优先级排列；活动/升级弹窗需先点 ok 关闭
+        actions = (
+            (huodong, ok),
+            (level, ok),
+            (result, result),
+            (expensive, expensive),
+            (watch, watch),
+        )
+        # 每个界面的等待预算与原先逐步 find_with_retry 的重试时长一致，动画较慢时不会提前放弃
+        window = self.finder.retry_window()
+        deadline = time.monotonic() + window
+        rounds = 0
+        await TimingController.sleep(1.0)
+        while rounds < self._SKIP_MAX_ROUNDS:
+            found = await self.finder.find_any(tids)
+            if select_start in found:
+                break  # 已回到配队界面
+
+            action = next(((marker, target) for marker, target in actions
+                           if marker in found and target in found), None)
+            if action is None:
+                if time.monotonic() >= deadline:
+                    logging.warning(f"结算界面 {window:.0f}s 内未出现可点击目标")
+                    break
+                await TimingController.sleep(self._SKIP_POLL_INTERVAL)
+                self.finder.invalidate_screen()  # 重试必须基于新画面
+                continue
+
+            rounds += 1
+            logging.info(f"结算界面: {self.finder.table.names[action[0]]}")
+            await self.clicker.execute_click(self.finder.click_target(found[action[1]]))
+            if action[0] == watch:
+                break
+            await TimingController.sleep(1.0)
+            deadline = time.monotonic() + window
+        await TimingController.sleep(3)
+
+    async def _process_normal_battle(self):
         """正常战斗流程"""
         duration = self.cfg['battle'].get('battle_duration', 80)
         logging.info(f"进入正常战斗流程，预计持续时间: {duration}秒")
-        time.sleep(duration)
+        await TimingController.sleep(duration)
 
 if __name__ == "__main__":
     try:
-        GameAuto().execute_battle_flow()
+        asyncio.run(GameAuto().run())
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
         logging.error(f"程序异常终止: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""测试公共设置：无显示器环境下也能构造 ImageFinder"""
+import copy
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+try:
+    import pyautogui  # noqa: F401
+except Exception:  # 无显示环境：测试用不到鼠标
+    sys.modules['pyautogui'] = types.ModuleType('pyautogui')
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# 截图显示器区域：原点不在 (0, 0)，用于检查坐标换算
+MONITOR = {'left': 100, 'top': 50, 'width': 64, 'height': 48}
+
+
+class FakeSct:
+    """替代 mss 句柄，构造 ImageFinder 时无需真实显示器"""
+    monitors = [{}, MONITOR]
+
+
+@pytest.fixture
+def finder(monkeypatch):
+    import main
+    monkeypatch.setattr(main.mss, 'mss', FakeSct)
+    # 使用默认配置，不依赖工作目录下的 config.json
+    return main.ImageFinder(main._freeze(copy.deepcopy(main._DEFAULT_CONFIG)))
@@ -0,0 +1,38 @@
+"""配置读取：与默认配置深度合并并冻结为只读结构"""
+import json
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+pytest.importorskip('mss')
+
+import main  # noqa: E402
+
+
+def test_read_config_merges_and_freezes(tmp_path, monkeypatch):
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps({'battle': {
+        'retry_interval': 5,
+        'confidence_thresholds': {'ok.png': 0.9},
+        'exact_templates': ['ok.png'],
+    }}))
+    monkeypatch.setattr(main, 'CONFIG_PATH', str(config_path))
+
+    cfg = main._read_config()
+    battle = cfg['battle']
+    assert battle['retry_interval'] == 5
+    assert dict(battle['confidence_thresholds']) == {'continue.png': 0.4, 'default': 0.8, 'ok.png': 0.9}
+    assert battle['exact_templates'] == ('ok.png',)
+    assert battle['battle_duration'] == main._DEFAULT_CONFIG['battle']['battle_duration']
+    with pytest.raises(TypeError):
+        battle['retry_interval'] = 1
+    # 合并不得改动默认配置
+    assert 'ok.png' not in main._DEFAULT_CONFIG['battle']['confidence_thresholds']
+
+
+def test_read_config_falls_back_to_defaults(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'CONFIG_PATH', str(tmp_path / 'missing.json'))
+    cfg = main._read_config()
+    assert cfg['battle']['retry_interval'] == main._DEFAULT_CONFIG['battle']['retry_interval']
+    assert isinstance(cfg['battle'], main.MappingProxyType)
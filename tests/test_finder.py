@@ -0,0 +1,112 @@
+"""ImageFinder 的坐标换算、重试轮询与查找区域学习"""
+import asyncio
+import json
+import types
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+pytest.importorskip('mss')
+
+import main  # noqa: E402
+from conftest import MONITOR  # noqa: E402
+
+
+def test_click_target_adds_monitor_origin(finder):
+    assert finder.click_target((10, 20), random_jitter=False) == (110, 70)
+    assert finder.click_target((10, 20), 5, -3, random_jitter=False) == (115, 67)
+
+
+def test_click_target_clamps_to_monitor(finder):
+    right = MONITOR['left'] + MONITOR['width'] - 1
+    bottom = MONITOR['top'] + MONITOR['height'] - 1
+    assert finder.click_target((60, 40), 10, 10, random_jitter=False) == (right, bottom)
+    assert finder.click_target((2, 2), -10, -10, random_jitter=False) == (MONITOR['left'], MONITOR['top'])
+
+
+def test_click_target_jitter_stays_in_range(finder):
+    jitter = finder._CLICK_JITTER
+    for _ in range(200):
+        x, y = finder.click_target((0, 30))
+        assert MONITOR['left'] <= x <= MONITOR['left'] + jitter
+        assert abs(y - (MONITOR['top'] + 30)) <= jitter
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """以假时钟替换等待：sleep 只推进时间并记录时长"""
+    state = types.SimpleNamespace(now=0.0, sleeps=[])
+
+    async def sleep(seconds):
+        state.sleeps.append(seconds)
+        state.now += seconds
+
+    monkeypatch.setattr(main, 'time', types.SimpleNamespace(monotonic=lambda: state.now))
+    monkeypatch.setattr(main.TimingController, 'sleep', staticmethod(sleep))
+    return state
+
+
+def _stub_find_image(monkeypatch, finder, hit_on=None):
+    calls = []
+
+    async def find_image(tid):
+        calls.append(tid)
+        return (1, 2) if len(calls) == hit_on else None
+
+    monkeypatch.setattr(finder, 'find_image', find_image)
+    return calls
+
+
+def test_find_with_retry_doubles_interval_until_deadline(finder, fake_clock, monkeypatch):
+    calls = _stub_find_image(monkeypatch, finder)
+    assert asyncio.run(finder.find_with_retry(0, max_wait=5)) is None
+    # 前三次保持初始间隔，之后倍增至上限；下一次等待会越过截止时间时立即返回
+    assert fake_clock.sleeps == [0.25, 0.25, 0.25, 0.5, 1.0, 2.0]
+    assert len(calls) == 7
+    assert fake_clock.now <= 5
+
+
+def test_find_with_retry_default_window(finder, fake_clock, monkeypatch):
+    _stub_find_image(monkeypatch, finder)
+    asyncio.run(finder.find_with_retry(0))
+    window = finder.retry_window()
+    assert window == 2 * (2 ** 3 - 2)
+    assert fake_clock.now <= window < fake_clock.now + finder._POLL_INTERVAL_MAX
+
+
+def test_find_with_retry_returns_first_hit(finder, fake_clock, monkeypatch):
+    calls = _stub_find_image(monkeypatch, finder, hit_on=3)
+    tid = finder.table.add('a.png', None, 0.8, None)
+    assert asyncio.run(finder.find_with_retry(tid)) == (1, 2)
+    assert len(calls) == 3
+    assert fake_clock.sleeps == [0.25, 0.25]
+
+
+def test_checked_hint():
+    assert main.ImageFinder._checked_hint('a.png', (1, 2, 3, 4)) == [1, 2, 3, 4]
+    assert main.ImageFinder._checked_hint('a.png', None) is None
+    for bad in ([1, 2, 3], [1, 2, 3, 'x'], [-1, 0, 3, 4], [0, 0, 0, 4], [True, 0, 3, 4], 'abcd'):
+        assert main.ImageFinder._checked_hint('a.png', bad) is None
+
+
+def test_roi_hint_learned_once_and_saved(finder, tmp_path, monkeypatch):
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps({'battle': {'retry_interval': 3, 'roi_hints': {'b.png': [1, 2, 3, 4]}}}))
+    monkeypatch.setattr(main, 'CONFIG_PATH', str(config_path))
+
+    tid = finder.table.add('a.png', [np.zeros((10, 20), np.float32)], 0.8, None)
+    finder._learn_roi_hint(tid, (50, 40), (10, 20))
+    hint = finder.table.rois[tid]
+    assert hint == [20, 15, 60, 50]
+    finder._learn_roi_hint(tid, (5, 5), (10, 20))  # 已有提示时不覆盖
+    assert finder.table.rois[tid] == hint
+
+    finder.save_roi_hints()
+    data = json.loads(config_path.read_text(encoding='utf-8'))
+    assert data['battle']['retry_interval'] == 3
+    assert data['battle']['roi_hints'] == {'b.png': [1, 2, 3, 4], 'a.png': hint}
+
+    config_path.write_text('{}')
+    finder.save_roi_hints()  # 没有新提示时不写盘
+    assert config_path.read_text() == '{}'
@@ -0,0 +1,60 @@
+"""NCC 内核与 cv2.matchTemplate(TM_CCOEFF_NORMED) 的一致性检查"""
+import pytest
+
+np = pytest.importorskip('numpy')
+cv2 = pytest.importorskip('cv2')
+pytest.importorskip('mss')
+
+import main  # noqa: E402
+
+TMPL_Y, TMPL_X, TMPL_H, TMPL_W = 30, 40, 14, 16
+FLAT_H, FLAT_W = 20, 30  # ROI 左上角的纯色区域
+
+
+@pytest.fixture
+def frame():
+    """非连续的 float32 ROI 切片，左上角含纯色窗口"""
+    rng = np.random.default_rng(0)
+    full = rng.random((80, 100), dtype=np.float32)
+    roi = full[5:70, 7:95]
+    roi[:FLAT_H, :FLAT_W] = 0.5
+    assert not roi.flags['C_CONTIGUOUS']
+    return roi
+
+
+@pytest.fixture
+def tmpl(frame):
+    return frame[TMPL_Y:TMPL_Y + TMPL_H, TMPL_X:TMPL_X + TMPL_W].copy()
+
+
+def _check(res, frame, tmpl, atol):
+    """非纯色窗口与 OpenCV 一致，纯色窗口记 0，峰值落在模板原位置"""
+    ref = cv2.matchTemplate(np.ascontiguousarray(frame), tmpl, cv2.TM_CCOEFF_NORMED)
+    assert res.shape == ref.shape
+    assert np.isfinite(res).all()
+
+    flat = np.zeros(ref.shape, bool)
+    flat[:FLAT_H - TMPL_H + 1, :FLAT_W - TMPL_W + 1] = True
+    np.testing.assert_allclose(res[~flat], ref[~flat], atol=atol)
+    assert (res[flat] == 0).all()
+    assert np.unravel_index(np.argmax(res), res.shape) == (TMPL_Y, TMPL_X)
+
+
+def test_ncc_via_sat(finder, frame, tmpl):
+    res = finder._ncc_via_sat(frame, tmpl, float(tmpl.mean()), float(tmpl.std()))
+    _check(res, frame, tmpl, atol=1e-4)
+
+
+def test_fft_ccorr(finder, frame, tmpl):
+    tid = finder.table.add('kernel.png', [tmpl], 0.8, None)
+    ccorr = finder._fft_ccorr(tid, 0, frame, tmpl)
+    res = finder._ncc_via_sat(frame, tmpl, float(tmpl.mean()), float(tmpl.std()), ccorr)
+    _check(res, frame, tmpl, atol=1e-3)
+
+
+@pytest.mark.skipif(main.ncc_scan is None, reason="未安装 numba")
+def test_ncc_scan(frame, tmpl):
+    H, W = frame.shape
+    res = np.empty((H - TMPL_H + 1, W - TMPL_W + 1), np.float32)
+    main.ncc_scan(frame, tmpl, float(tmpl.mean()), float(tmpl.std()), res)
+    _check(res, frame, tmpl, atol=1e-4)